@@ -1,47 +1,113 @@
+from functools import lru_cache
+
 import numpy as np
 import matplotlib.pyplot as plt
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from scipy.fft import rfft, irfft, next_fast_len
+from scipy.signal.windows import tukey as _tukey
 
 
 def tukey_window(n, alpha=0.1):
     """Return a Tukey window of length n."""
-    return np.hanning(int(alpha * (n - 1)))[:int(alpha * (n - 1) // 2)].tolist() + \
-        [1.0] * (n - int(alpha * (n - 1))) + \
-        np.hanning(int(alpha * (n - 1)))[int(alpha * (n - 1) // 2):].tolist()
+    return _tukey(n, alpha)
+
+
+@lru_cache(maxsize=8)
+def _get_window(n, alpha):
+    """Cached, read-only Tukey window of length n."""
+    win = tukey_window(n, alpha=alpha)
+    win.setflags(write=False)
+    return win
+
 
+def _scratch_buffer(scratch, name, shape, dtype):
+    """Return scratch[name] if it has this shape/dtype, else (re)allocate it."""
+    if scratch is None:
+        return np.empty(shape, dtype=dtype)
+    buf = scratch.get(name)
+    if buf is None or buf.shape != shape or buf.dtype != dtype:
+        buf = scratch[name] = np.empty(shape, dtype=dtype)
+    return buf
 
-def rtp_1d(distance, anomaly, dx, inc, dec, azimuth):
+
+def rtp_setup(distance, anomaly, scratch=None):
     """
-    Apply 1D Reduction to Pole (RTP) filter.
+    Detrend, taper and forward-transform a profile for RTP filtering.
+
+    The result depends only on the distance and anomaly data, so it can be
+    reused with :func:`rtp_apply` for any number of field/profile angles.
 
     Parameters
     ----------
-    distance : np.ndarray
-        Distance along profile (m).
-    anomaly : np.ndarray
-        Magnetic anomaly (nT).
-    dx : float
-        Sampling interval (m).
+    distance : array_like
+        Distance along profile (m), same length as ``anomaly``.
+    anomaly : array_like
+        Magnetic anomaly (nT), processed in single precision.
+    scratch : dict, optional
+        Work buffers reused between calls (the zero-padded FFT input).
+
+    Returns
+    -------
+    spec : np.ndarray
+        complex64 half-spectrum of the tapered, zero-padded anomaly.
+    n : int
+        Original profile length.
+    N : int
+        Padded FFT length.
+    """
+    # Single precision throughout: nT data rarely has more than 5 significant
+    # digits, and float32/complex64 halve the bytes moved by every stage
+    anomaly = np.ascontiguousarray(anomaly, dtype=np.float32)
+    distance = np.asarray(distance)
+    n = len(anomaly)
+    if distance.shape != (n,):
+        raise ValueError(f"distance and anomaly must be 1-D and the same length "
+                         f"(got {distance.shape} and {anomaly.shape})")
+    N = next_fast_len(2 * n, real=True)  # pad to >= 2x, smallest fast length
+    # Detrend, taper and zero-pad all land in one N-length buffer: the first
+    # n samples hold (in turn) centred distance, trend, residual and tapered
+    # residual; the rest is the zero padding
+    buf = _scratch_buffer(scratch, 'pad', (N,), np.float32)
+    work = buf[:n]
+    # Detrend (closed-form least-squares line)
+    dm = distance.mean()
+    am = anomaly.mean()
+    np.subtract(distance, dm, out=work)
+    slope = np.dot(work, anomaly - am) / np.dot(work, work)
+    work *= slope
+    work += am
+    np.subtract(anomaly, work, out=work)
+    # Apply taper
+    work *= _get_window(n, 0.1)
+    buf[n:] = 0.0
+
+    # FFT (real input, so only the non-negative half-spectrum is needed)
+    spec = rfft(buf, overwrite_x=True)
+    return spec, n, N
+
+
+def rtp_apply(spec, inc, dec, azimuth, n, N, scratch=None):
+    """
+    Apply the RTP operator to a spectrum from :func:`rtp_setup`.
+
+    Parameters
+    ----------
+    spec, n, N
+        As returned by :func:`rtp_setup`.
     inc, dec : float
         Earth's field inclination and declination (degrees).
     azimuth : float
         Profile azimuth (deg from North to East).
+    scratch : dict, optional
+        Work buffers reused between calls (e.g. while sweeping angles).
+        ``spec`` itself is never modified.
 
     Returns
     -------
     rtp_anomaly : array
-        RTP-transformed anomaly (nT).
+        RTP-transformed anomaly (nT), float32.
     """
-    n = len(anomaly)
-    # Detrend
-    anomaly = anomaly - np.polyval(np.polyfit(distance, anomaly, 1), distance)
-    # Apply taper
-    win = np.array(tukey_window(n, alpha=0.1))
-    anomaly = anomaly * win
-
-    # FFT
-    spec = np.fft.fft(anomaly, n=2 ** int(np.ceil(np.log2(n * 2))))  # pad to 2x power of 2
-    k = np.fft.fftfreq(len(spec), d=dx) * 2 * np.pi  # wavenumber (rad/m)
-
     # Angles to radians
     I0 = np.deg2rad(inc)
     D0 = np.deg2rad(dec)
@@ -58,21 +124,62 @@ def rtp_1d(distance, anomaly, dx, inc, dec, azimuth):
 
     # RTP operator (1D simplification along profile)
     # Formula: scale factor = (Fz) / (Fx*cosθ + Fy*sinθ + i*Fz*sign(k))
-    op = np.zeros_like(spec, dtype=complex)
-    for i, ki in enumerate(k):
-        if ki == 0:
-            op[i] = 1.0
-        else:
-            sign = np.sign(ki)
-            denom = Fx * kx + Fy * ky + 1j * Fz * sign
-            op[i] = (Fz) / denom
+    # With k >= 0 only, sign(k) is 1 everywhere except the DC bin, so the
+    # operator is a single constant applied in one pass; DC passes unchanged.
+    # Evaluate Fz * conj(denom) / |denom|^2 scaled by |denom| so a tiny
+    # denominator cannot overflow or produce NaN.
+    c = Fx * kx + Fy * ky
+    mag = np.hypot(c, Fz)
+    if mag == 0:
+        raise ValueError("RTP operator is undefined for a horizontal field "
+                         "perpendicular to the profile")
+    op = spec.dtype.type((Fz / mag) * complex(c / mag, -Fz / mag))
 
-    spec_rtp = spec * op
+    spec_rtp = _scratch_buffer(scratch, 'spec', spec.shape, spec.dtype)
+    np.multiply(spec[1:], op, out=spec_rtp[1:])
+    spec_rtp[0] = spec[0]
 
     # Inverse FFT
-    rtp = np.fft.ifft(spec_rtp).real[:n]
+    rtp = irfft(spec_rtp, n=N, overwrite_x=True)[:n]
     return rtp
 
+
+def rtp_1d(distance, anomaly, dx, inc, dec, azimuth, scratch=None):
+    """
+    Apply 1D Reduction to Pole (RTP) filter.
+
+    Parameters
+    ----------
+    distance : array_like
+        Distance along profile (m), same length as ``anomaly``.
+    anomaly : array_like
+        Magnetic anomaly (nT).
+    dx : float
+        Sampling interval (m). The 1D operator depends only on sign(k), not
+        on the wavenumber magnitude, so dx does not change the result; it is
+        kept so existing callers need no change.
+    inc, dec : float
+        Earth's field inclination and declination (degrees).
+    azimuth : float
+        Profile azimuth (deg from North to East).
+    scratch : dict, optional
+        Work buffers reused between calls, see :func:`rtp_setup` and
+        :func:`rtp_apply`.
+
+    Returns
+    -------
+    rtp_anomaly : array
+        RTP-transformed anomaly (nT).
+    """
+    spec, n, N = rtp_setup(distance, anomaly, scratch=scratch)
+    return rtp_apply(spec, inc, dec, azimuth, n, N, scratch=scratch)
+
+
+def write_csv(df, path):
+    """Write a DataFrame (without its index) using PyArrow's CSV writer."""
+    pa_csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), path)
+
+
 def graph_rtp(anomaly: np.ndarray, rtp_anomaly: np.ndarray, distance: np.ndarray, title: str = "1D Reduction to Pole (RTP)") -> None:
     plt.figure(figsize=(10, 5))
     plt.plot(distance, anomaly, label="Observed")
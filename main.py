@@ -1,14 +1,15 @@
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 
-from common import rtp_1d, graph_rtp
+from common import rtp_1d, graph_rtp, write_csv
 
 if __name__ == "__main__":
     # Example usage
     # CSV with columns: distance, anomaly
-    df = pd.read_csv("profile.csv")
+    df = pd.read_csv("profile.csv", engine="pyarrow")
     distance = df["distance"].values
-    anomaly = df["anomaly"].values
+    anomaly = df["anomaly"].to_numpy(dtype=np.float32)
 
     dx = 10.0  # spacing (m)
     inc = 42.3  # Earth field inclination (deg)
@@ -21,7 +22,7 @@ if __name__ == "__main__":
 
     # Save and plot
     df["rtp"] = rtp_anomaly
-    df.to_csv("profile_rtp.csv", index=False)
+    write_csv(df, "profile_rtp.csv")
 
     graph_rtp(
         anomaly=anomaly,
@@ -8,19 +8,19 @@ import sys
 
 import numpy as np
 import pandas as pd
-from PySide6.QtCore import (Qt, QThread, Signal)
+from PySide6.QtCore import (Qt, QAbstractTableModel, QModelIndex, QThread, QTimer, Signal)
 from PySide6.QtGui import (QFont)
 from PySide6.QtWidgets import (
     QApplication, QComboBox, QDoubleSpinBox, QFrame,
     QGridLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QSizePolicy,
-    QSlider, QTabWidget, QTableWidget, QTableWidgetItem,
+    QSlider, QTabWidget, QTableView,
     QWidget, QFileDialog, QMessageBox, QVBoxLayout, QProgressBar
 )
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
 # Import the RTP processing functions
-from common import rtp_1d
+from common import rtp_apply, rtp_setup, write_csv
 
 
 def get_resource_path(relative_path):
@@ -44,6 +44,44 @@ class MplCanvas(FigureCanvas):
         self.updateGeometry()
 
 
+class PandasModel(QAbstractTableModel):
+    """Read-only table model backed by a pandas DataFrame.
+    
+    Cells are formatted on demand, so only the visible rows cost anything.
+    """
+    
+    def __init__(self, df, parent=None):
+        super().__init__(parent)
+        self._df = df
+    
+    def set_dataframe(self, df):
+        """Replace the backing DataFrame and refresh attached views."""
+        self.beginResetModel()
+        self._df = df
+        self.endResetModel()
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._df)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._df.columns)
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        value = self._df.iat[index.row(), index.column()]
+        if isinstance(value, (float, np.floating)):
+            return f"{value:.4f}"
+        return str(value)
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return str(self._df.columns[section])
+        return str(section + 1)
+
+
 class RTPProcessor(QThread):
     """Background thread for RTP processing to prevent UI freezing."""
     
@@ -51,21 +89,29 @@ class RTPProcessor(QThread):
     error = Signal(str)
     progress = Signal(int)
     
-    def __init__(self, distance, anomaly, dx, inc, dec, azimuth):
+    def __init__(self, distance, anomaly, inc, dec, azimuth, setup=None, scratch=None):
         super().__init__()
         self.distance = distance
         self.anomaly = anomaly
-        self.dx = dx
         self.inc = inc
         self.dec = dec
         self.azimuth = azimuth
+        # Result of rtp_setup(); computed here when None and handed back to
+        # the window with the result, so later angle changes can reuse it
+        self.setup = setup
+        # Work buffers shared with previous runs, see rtp_apply()
+        self.scratch = scratch
     
     def run(self):
         try:
             self.progress.emit(10)
+            if self.setup is None:
+                self.setup = rtp_setup(self.distance, self.anomaly, scratch=self.scratch)
+            self.progress.emit(50)
             # Apply RTP transformation
-            rtp_result = rtp_1d(self.distance, self.anomaly, self.dx, 
-                               self.inc, self.dec, self.azimuth)
+            spec, n, N = self.setup
+            rtp_result = rtp_apply(spec, self.inc, self.dec, self.azimuth, n, N,
+                                   scratch=self.scratch)
             self.progress.emit(90)
             
             # Apply amplitude flip as in original code
@@ -90,6 +136,22 @@ class RTPMainWindow(QWidget):
         self.csv_data = None
         self.processed_data = None
         self.current_file_path = None
+        # Column the RTP result is written to; never one of the loaded columns
+        self._result_col = 'RTP_Processed'
+        # Bumped on every file load so a compute started on a previous file
+        # can be recognised (and its result dropped) when it finishes
+        self._load_token = 0
+        self._compute_load_token = None
+        
+        # rtp_setup() result for the selected columns, built by the worker on
+        # the first compute; only the cheap rtp_apply() step reruns when the
+        # angles change. The token is bumped whenever the cache is invalidated
+        # so a setup from a compute started before that is not stored.
+        self._rtp_setup = None
+        self._rtp_setup_token = 0
+        self._compute_setup_token = None
+        # FFT work buffers reused across computes
+        self._scratch = {'pad': None, 'spec': None}
         
         # Processing thread
         self.processor_thread = None
@@ -145,9 +207,13 @@ class RTPMainWindow(QWidget):
         self.gridLayout.setHorizontalSpacing(0)
         self.gridLayout.setContentsMargins(0, 0, 0, 0)
         
-        self.tableWidget = QTableWidget(self.tab)
-        self.tableWidget.setObjectName("tableWidget")
-        self.gridLayout.addWidget(self.tableWidget, 0, 0, 1, 1)
+        self.tableView = QTableView(self.tab)
+        self.tableView.setObjectName("tableView")
+        self.tableModel = PandasModel(pd.DataFrame(), self.tableView)
+        self.tableView.setModel(self.tableModel)
+        # Set when column autosizing was skipped while the Table tab was hidden
+        self._table_stale = False
+        self.gridLayout.addWidget(self.tableView, 0, 0, 1, 1)
         
         self.tabWidget.addTab(self.tab, "Table")
         
@@ -160,6 +226,19 @@ class RTPMainWindow(QWidget):
         self.canvas = MplCanvas(self.tab_2, width=10, height=5, dpi=100)
         self.gridLayout_3.addWidget(self.canvas)
         
+        # Preview artists kept between redraws so the RTP curve can be blitted
+        self._preview_key = None
+        self._preview_ax = None
+        self._line_rtp = None
+        self._preview_bg = None
+        self.canvas.mpl_connect('draw_event', self._on_preview_draw)
+        
+        # Coalesces bursts of selection changes into a single redraw
+        self._preview_timer = QTimer(self)
+        self._preview_timer.setSingleShot(True)
+        self._preview_timer.setInterval(100)
+        self._preview_timer.timeout.connect(self.update_preview)
+        
         self.tabWidget.addTab(self.tab_2, "Graph Preview")
         self.gridLayout_2.addWidget(self.tabWidget, 2, 0, 1, 4)
         
@@ -274,6 +353,9 @@ class RTPMainWindow(QWidget):
         # File operations
         self.pushButton.clicked.connect(self.browse_file)
         
+        # Table is only refreshed once it is actually shown
+        self.tabWidget.currentChanged.connect(self.on_tab_changed)
+        
         # Processing
         self.pushButton_3.clicked.connect(self.compute_rtp)
         self.pushButton_2.clicked.connect(self.export_results)
@@ -295,8 +377,12 @@ class RTPMainWindow(QWidget):
             lambda v: self.horizontalSlider_3.setValue(int(v)))
         
         # Column selection
-        self.comboBox.currentTextChanged.connect(self.update_preview)
-        self.comboBox_2.currentTextChanged.connect(self.update_preview)
+        self.comboBox.currentTextChanged.connect(self.schedule_preview)
+        self.comboBox_2.currentTextChanged.connect(self.schedule_preview)
+        
+        # Forward transform depends only on the data columns
+        self.comboBox.currentTextChanged.connect(self.invalidate_rtp_setup)
+        self.comboBox_2.currentTextChanged.connect(self.invalidate_rtp_setup)
         
     def setupDefaults(self):
         """Set default values."""
@@ -309,12 +395,25 @@ class RTPMainWindow(QWidget):
         
         if file_path:
             try:
-                self.csv_data = pd.read_csv(file_path)
+                self.csv_data = pd.read_csv(file_path, engine="pyarrow")
                 self.current_file_path = file_path
+                self._load_token += 1
+                # Results belong to the previous file
+                self.processed_data = None
+                self.pushButton_2.setEnabled(False)
+                # A re-opened export already has RTP_Processed; don't overwrite it
+                self._result_col = 'RTP_Processed'
+                suffix = 1
+                while self._result_col in self.csv_data.columns:
+                    suffix += 1
+                    self._result_col = f'RTP_Processed_{suffix}'
                 self.lineEdit.setText(file_path)
                 
-                # Populate column dropdowns
+                # Populate column dropdowns (one preview pass afterwards
+                # instead of one per intermediate selection)
                 columns = list(self.csv_data.columns)
+                self.comboBox.blockSignals(True)
+                self.comboBox_2.blockSignals(True)
                 self.comboBox.clear()
                 self.comboBox_2.clear()
                 self.comboBox.addItems(columns)
@@ -326,6 +425,11 @@ class RTPMainWindow(QWidget):
                         self.comboBox.setCurrentIndex(i)
                     elif 'anomaly' in col.lower() or 'y' in col.lower():
                         self.comboBox_2.setCurrentIndex(i)
+                self.comboBox.blockSignals(False)
+                self.comboBox_2.blockSignals(False)
+                self._preview_key = None
+                self.update_preview()
+                self.invalidate_rtp_setup()
                 
                 # Update table display
                 self.update_table()
@@ -336,29 +440,26 @@ class RTPMainWindow(QWidget):
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to load file: {str(e)}")
     
+    def on_tab_changed(self, index):
+        """Autosize the table columns if that was skipped while hidden."""
+        if self._table_stale and self.tabWidget.widget(index) is self.tab:
+            self._table_stale = False
+            self.tableView.resizeColumnsToContents()
+    
     def update_table(self):
         """Update the data table widget."""
         if self.csv_data is None:
             return
         
-        df = self.csv_data.copy()
-        if self.processed_data is not None:
-            df['RTP_Processed'] = self.processed_data
-        
-        self.tableWidget.setRowCount(len(df))
-        self.tableWidget.setColumnCount(len(df.columns))
-        self.tableWidget.setHorizontalHeaderLabels(df.columns.tolist())
-        
-        for i in range(len(df)):
-            for j, col in enumerate(df.columns):
-                value = df.iloc[i, j]
-                if isinstance(value, (int, float)):
-                    item = QTableWidgetItem(f"{value:.4f}")
-                else:
-                    item = QTableWidgetItem(str(value))
-                self.tableWidget.setItem(i, j, item)
-        
-        self.tableWidget.resizeColumnsToContents()
+        # The result column is already part of csv_data once computed. The
+        # model reset is cheap and always done so Qt sees every shape change;
+        # only the autosize (which samples rows) waits for the tab to show.
+        self.tableModel.set_dataframe(self.csv_data)
+        if self.tabWidget.currentWidget() is not self.tab:
+            self._table_stale = True
+            return
+        self._table_stale = False
+        self.tableView.resizeColumnsToContents()
     
     def update_preview(self):
         """Update the graph preview."""
@@ -372,17 +473,36 @@ class RTPMainWindow(QWidget):
             return
         
         try:
+            key = (distance_col, anomaly_col)
+            if (key == self._preview_key and self._line_rtp is not None
+                    and self._preview_bg is not None and self.processed_data is not None):
+                ymin, ymax = self._preview_ax.get_ylim()
+                if (np.nanmin(self.processed_data) >= ymin
+                        and np.nanmax(self.processed_data) <= ymax):
+                    # Only the RTP curve changed: repaint it over the cached background
+                    self._line_rtp.set_ydata(self.processed_data)
+                    self.canvas.restore_region(self._preview_bg)
+                    self._preview_ax.draw_artist(self._line_rtp)
+                    self.canvas.blit(self._preview_ax.bbox)
+                    return
+            
             distance = self.csv_data[distance_col].values
             anomaly = self.csv_data[anomaly_col].values
             
             self.canvas.fig.clear()
             ax = self.canvas.fig.add_subplot(111)
+            self._preview_key = key
+            self._preview_ax = ax
+            self._line_rtp = None
+            self._preview_bg = None
             
             ax.plot(distance, anomaly, 'b-', label='Original Data', linewidth=1.5)
             
             if self.processed_data is not None:
-                ax.plot(distance, self.processed_data, 'r--', 
-                       label='RTP Processed', linewidth=1.5)
+                # Animated: drawn by _on_preview_draw on top of the saved background
+                self._line_rtp, = ax.plot(distance, self.processed_data, 'r--',
+                                          label='RTP Processed', linewidth=1.5,
+                                          animated=True)
             
             ax.set_xlabel('Distance (m)')
             ax.set_ylabel('Anomaly (nT)')
@@ -394,8 +514,28 @@ class RTPMainWindow(QWidget):
             self.canvas.draw()
             
         except Exception as e:
+            self._preview_key = None
             print(f"Preview update error: {e}")
     
+    def schedule_preview(self, *_):
+        """Redraw the preview once the selection has settled."""
+        self._preview_timer.start()
+    
+    def _on_preview_draw(self, event):
+        """Cache the static background and paint the RTP curve over it."""
+        if event.canvas is not self.canvas:
+            return
+        if self._line_rtp is None:
+            self._preview_bg = None
+            return
+        self._preview_bg = self.canvas.copy_from_bbox(self._preview_ax.bbox)
+        self._preview_ax.draw_artist(self._line_rtp)
+    
+    def invalidate_rtp_setup(self, *_):
+        """Drop the cached forward transform; the next compute rebuilds it."""
+        self._rtp_setup = None
+        self._rtp_setup_token += 1
+    
     def compute_rtp(self):
         """Start RTP computation in background thread."""
         if self.csv_data is None:
@@ -415,16 +555,20 @@ class RTPMainWindow(QWidget):
         
         try:
             distance = self.csv_data[distance_col].values
-            anomaly = self.csv_data[anomaly_col].values
+            # Single precision is ample for nT data and halves FFT traffic
+            anomaly = self.csv_data[anomaly_col].to_numpy(dtype=np.float32)
             
-            # Get parameters
-            dx = self.doubleSpinBox.value()
+            # Get parameters (spacing does not affect the 1D RTP operator)
             inc = self.doubleSpinBox_2.value()
             dec = self.doubleSpinBox_3.value()
             azimuth = self.doubleSpinBox_4.value()
             
             # Start processing thread
-            self.processor_thread = RTPProcessor(distance, anomaly, dx, inc, dec, azimuth)
+            self._compute_setup_token = self._rtp_setup_token
+            self._compute_load_token = self._load_token
+            self.processor_thread = RTPProcessor(distance, anomaly, inc, dec, azimuth,
+                                                 setup=self._rtp_setup,
+                                                 scratch=self._scratch)
             self.processor_thread.finished.connect(self.on_processing_finished)
             self.processor_thread.error.connect(self.on_processing_error)
             self.processor_thread.progress.connect(self.progressBar.setValue)
@@ -441,9 +585,23 @@ class RTPMainWindow(QWidget):
     
     def on_processing_finished(self, result):
         """Handle successful RTP processing."""
-        self.processed_data = result
         self.progressBar.setVisible(False)
         self.pushButton_3.setEnabled(True)
+        
+        if self._compute_load_token != self._load_token:
+            # A different file was loaded while this ran; the result is stale
+            return
+        
+        self.processed_data = result
+        if self._compute_setup_token == self._rtp_setup_token:
+            self._rtp_setup = self.processor_thread.setup
+        # Stored on the loaded frame so the table and export need no copy.
+        # The table model shares that frame, so it is reset around the write.
+        self.tableModel.beginResetModel()
+        try:
+            self.csv_data[self._result_col] = result
+        finally:
+            self.tableModel.endResetModel()
         self.pushButton_2.setEnabled(True)
         
         # Update displays
@@ -459,21 +617,30 @@ class RTPMainWindow(QWidget):
         QMessageBox.critical(self, "Processing Error", f"RTP processing failed: {error_msg}")
     
     def export_results(self):
-        """Export processed results to CSV file."""
+        """Export processed results to a CSV or Parquet file."""
         if self.processed_data is None:
             QMessageBox.warning(self, "Warning", "No processed data to export")
             return
         
-        file_path, _ = QFileDialog.getSaveFileName(
-            self, "Save Results", "profile_rtp.csv", "CSV Files (*.csv)")
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Save Results", "profile_rtp.csv",
+            "CSV Files (*.csv);;Parquet Files (*.parquet)")
         
         if file_path:
+            # The chosen filter decides the format; a missing suffix (or the
+            # default name's .csv when Parquet was picked) is filled in to match
+            root, ext = os.path.splitext(file_path)
+            is_parquet = (selected_filter.startswith("Parquet")
+                          or ext.lower() == ".parquet")
+            if is_parquet and ext.lower() != ".parquet":
+                file_path = (root if ext.lower() == ".csv" else file_path) + ".parquet"
+            elif not ext:
+                file_path += ".csv"
             try:
-                # Create export dataframe
-                export_df = self.csv_data.copy()
-                export_df['RTP_Processed'] = self.processed_data
-                
-                export_df.to_csv(file_path, index=False)
+                if is_parquet:
+                    self.csv_data.to_parquet(file_path, index=False)
+                else:
+                    write_csv(self.csv_data, file_path)
                 QMessageBox.information(self, "Success", 
                                       f"Results exported to {file_path}")
             except Exception as e:
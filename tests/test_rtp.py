@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+from scipy.fft import next_fast_len
+
+from common import rtp_1d, tukey_window
+
+
+def rtp_reference(distance, anomaly, inc, dec, azimuth):
+    """Float64, full-spectrum np.fft version of the RTP filter."""
+    distance = np.asarray(distance, dtype=np.float64)
+    anomaly = np.asarray(anomaly, dtype=np.float64)
+    n = len(anomaly)
+    anomaly = anomaly - np.polyval(np.polyfit(distance, anomaly, 1), distance)
+    anomaly = anomaly * tukey_window(n, alpha=0.1)
+
+    N = next_fast_len(2 * n, real=True)
+    spec = np.fft.fft(anomaly, n=N)
+    k = np.fft.fftfreq(N)
+
+    I0, D0, theta = np.deg2rad([inc, dec, azimuth])
+    Fx = np.cos(I0) * np.cos(D0)
+    Fy = np.cos(I0) * np.sin(D0)
+    Fz = np.sin(I0)
+    denom = Fx * np.cos(theta) + Fy * np.sin(theta) + 1j * Fz * np.sign(k)
+    op = np.ones(N, dtype=complex)
+    op[k != 0] = Fz / denom[k != 0]
+    return np.fft.ifft(spec * op).real[:n]
+
+
+def dipole_profile(n=2000, dx=5.0, depth=100.0):
+    """Synthetic anomaly over a buried dipole, plus a small regional trend."""
+    distance = np.arange(n) * dx
+    x = distance - distance.mean()
+    r2 = x ** 2 + depth ** 2
+    anomaly = 3e6 * (depth ** 2 - x ** 2) / r2 ** 2 + 1.2e7 * x * depth / r2 ** 2
+    return distance, anomaly + 0.01 * distance
+
+
+@pytest.mark.parametrize("inc, dec, azimuth", [
+    (42.3, 0.9719, 90.0),
+    (-30.0, 200.0, 10.0),
+    (70.0, 5.0, 45.0),
+    (5.0, 350.0, 120.0),
+])
+def test_float32_matches_float64_reference(inc, dec, azimuth):
+    distance, anomaly = dipole_profile()
+    expected = rtp_reference(distance, anomaly, inc, dec, azimuth)
+
+    result = rtp_1d(distance, anomaly.astype(np.float32), 5.0, inc, dec, azimuth)
+
+    assert result.dtype == np.float32
+    assert result.shape == expected.shape
+    rel_err = np.max(np.abs(result - expected)) / np.max(np.abs(expected))
+    assert rel_err < 1e-5
+
+
+def test_scratch_reuse_does_not_change_result():
+    distance, anomaly = dipole_profile()
+    scratch = {}
+    first = rtp_1d(distance, anomaly, 5.0, 42.3, 0.9719, 90.0, scratch=scratch).copy()
+    rtp_1d(distance[:1500], anomaly[:1500], 5.0, -30.0, 200.0, 10.0, scratch=scratch)
+    again = rtp_1d(distance, anomaly, 5.0, 42.3, 0.9719, 90.0, scratch=scratch)
+    np.testing.assert_array_equal(first, again)
+
+
+def test_accepts_array_likes():
+    distance, anomaly = dipole_profile(n=200)
+    expected = rtp_1d(distance, anomaly, 5.0, 42.3, 0.9719, 90.0)
+
+    result = rtp_1d(list(distance), list(anomaly), 5.0, 42.3, 0.9719, 90.0)
+
+    np.testing.assert_array_equal(result, expected)
+
+
+def test_mismatched_lengths_raise():
+    distance, anomaly = dipole_profile(n=200)
+    with pytest.raises(ValueError, match="same length"):
+        rtp_1d(distance[:150], anomaly, 5.0, 42.3, 0.9719, 90.0)